@@ -4,7 +4,9 @@
 
 import hashlib
 import logging
+import threading
 import time
+from collections import OrderedDict
 from functools import wraps
 from typing import Any, Callable, Dict, Optional
 
@@ -152,6 +154,93 @@ class SimpleCache:
         }
 
 
+class LRUCache:
+    """Потокобезопасный in-memory кэш с ограничением по количеству записей"""
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Инициализация кэша
+
+        Args:
+            maxsize: Максимальное количество записей, при превышении
+                вытесняются давно не использованные
+        """
+        self._cache: OrderedDict[str, Any] = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Получение значения из кэша
+
+        Args:
+            key: Ключ кэша
+
+        Returns:
+            Закэшированное значение или None если не найдено
+        """
+        with self._lock:
+            if key not in self._cache:
+                self._misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return self._cache[key]
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Сохранение значения в кэш
+
+        Args:
+            key: Ключ кэша
+            value: Значение для кэширования
+        """
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+
+            if len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        """
+        Удаление значения из кэша
+
+        Args:
+            key: Ключ кэша
+
+        Returns:
+            True если ключ был удален, False если не найден
+        """
+        with self._lock:
+            return self._cache.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Очистка всего кэша"""
+        with self._lock:
+            count = len(self._cache)
+            self._cache.clear()
+        logger.info(f"LRU cache cleared: {count} entries removed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Получение статистики кэша
+
+        Returns:
+            Словарь со статистикой
+        """
+        with self._lock:
+            return {
+                "total_entries": len(self._cache),
+                "maxsize": self._maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
 # Глобальный экземпляр кэша
 cache = SimpleCache(default_ttl=300)
 
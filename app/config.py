@@ -23,6 +23,7 @@ class Settings(BaseSettings):
     BITCOIN_RPC_PORT: int = 18445
     BITCOIN_RPC_USER: str = "bitcoinrpc"
     BITCOIN_RPC_PASSWORD: str = "your_secure_password"
+    BITCOIN_RPC_TX_CACHE_SIZE: int = 131072  # Подтвержденные транзакции в LRU
     # BITCOIN_RPC_PROTOCOL: str = "https"  # http или https
     # BITCOIN_RPC_HOST: str = "bitcoin-rpc.publicnode.com"
     # BITCOIN_RPC_PORT: int = 443
@@ -31,6 +32,7 @@ class Settings(BaseSettings):
 
     # API настройки
     CACHE_TTL: int = 300  # 5 минут
+    TRANSACTION_CACHE_SIZE: int = 10000  # Подтвержденные транзакции из БД в LRU
     MAX_BLOCKS_PER_PAGE: int = 50
     MAX_TRANSACTIONS_PER_PAGE: int = 100
 
@@ -3,11 +3,21 @@
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
 
+# Дополнительные параметры движка, зависящие от драйвера
+engine_options = {}
+if settings.DATABASE_URL.startswith(("postgresql://", "postgresql+psycopg2://")):
+    # psycopg2: INSERT с executemany (vin/vout) и так уходит многострочным
+    # VALUES (insertmanyvalues при режиме по умолчанию values_only);
+    # values_plus_batch дополнительно отправляет executemany для UPDATE и
+    # DELETE через execute_batch вместо отдельных запросов на каждую строку
+    engine_options["executemany_mode"] = "values_plus_batch"
+
 # Создаем движок базы данных
 engine = create_engine(
     settings.DATABASE_URL,
@@ -15,6 +25,7 @@ engine = create_engine(
         {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
     ),
     echo=settings.DEBUG,
+    **engine_options,
 )
 
 # Создаем фабрику сессий
@@ -34,3 +45,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(db: Session, model):
+    """
+    INSERT с поддержкой ON CONFLICT для диалекта текущей БД
+
+    Поддерживаются PostgreSQL и SQLite: у обоих есть on_conflict_do_nothing
+    и on_conflict_do_update с одинаковым API
+
+    Args:
+        db: Сессия базы данных
+        model: Модель или таблица для вставки
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
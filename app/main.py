@@ -2,11 +2,12 @@
 Главное FastAPI приложение Bitcoin Blockchain Explorer
 """
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.orm import Session
 
 from app.api import addresses, blocks, cache, search, sync, transactions
 from app.background import lifespan
@@ -58,9 +59,10 @@ async def root(request: Request):
 
 
 @app.get("/block/{hash_or_height}", response_class=HTMLResponse)
-async def block_page(request: Request, hash_or_height: str):
+async def block_page(
+    request: Request, hash_or_height: str, db: Session = Depends(get_db)
+):
     """Страница блока"""
-    db = next(get_db())
     block_service = BlockService(db)
 
     # Попробуем получить блок по хэшу или высоте
@@ -76,11 +78,10 @@ async def block_page(request: Request, hash_or_height: str):
 
 
 @app.get("/tx/{txid}", response_class=HTMLResponse)
-async def transaction_page(request: Request, txid: str):
+async def transaction_page(request: Request, txid: str, db: Session = Depends(get_db)):
     """Страница транзакции"""
-    db = next(get_db())
     tx_service = TransactionService(db)
-    tx = tx_service.get_or_fetch_transaction(txid)
+    tx = await tx_service.get_or_fetch_transaction(txid)
 
     return templates.TemplateResponse(
         "transaction.html", {"request": request, "tx": tx}
@@ -88,9 +89,8 @@ async def transaction_page(request: Request, txid: str):
 
 
 @app.get("/address/{address}", response_class=HTMLResponse)
-async def address_page(request: Request, address: str):
+async def address_page(request: Request, address: str, db: Session = Depends(get_db)):
     """Страница адреса"""
-    db = next(get_db())
     addr = db.query(Address).filter(Address.address == address).first()
 
     return templates.TemplateResponse(
@@ -111,7 +111,7 @@ async def transactions_page(request: Request):
 
 
 @app.get("/search", response_class=HTMLResponse)
-async def search_page(request: Request, q: str = ""):
+async def search_page(request: Request, q: str = "", db: Session = Depends(get_db)):
     """Страница поиска"""
     if not q:
         return templates.TemplateResponse(
@@ -119,7 +119,6 @@ async def search_page(request: Request, q: str = ""):
             {"request": request, "results": None, "query": ""},
         )
 
-    db = next(get_db())
     block_service = BlockService(db)
     tx_service = TransactionService(db)
 
@@ -153,9 +152,10 @@ async def search_page(request: Request, q: str = ""):
 
 
 @app.get("/components/latest-blocks", response_class=HTMLResponse)
-async def latest_blocks_component(request: Request, page: int = 1):
+async def latest_blocks_component(
+    request: Request, page: int = 1, db: Session = Depends(get_db)
+):
     """HTMX компонент последних блоков"""
-    db = next(get_db())
     block_service = BlockService(db)
 
     limit = 10
@@ -174,9 +174,10 @@ async def latest_blocks_component(request: Request, page: int = 1):
 
 
 @app.get("/components/latest-transactions", response_class=HTMLResponse)
-async def latest_transactions_component(request: Request, page: int = 1):
+async def latest_transactions_component(
+    request: Request, page: int = 1, db: Session = Depends(get_db)
+):
     """HTMX компонент последних транзакций"""
-    db = next(get_db())
     tx_service = TransactionService(db)
 
     limit = 10
@@ -197,10 +198,10 @@ async def latest_transactions_component(request: Request, page: int = 1):
 
 
 @app.get("/components/block-transactions", response_class=HTMLResponse)
-async def block_transactions_component(request: Request, hash: str):
+async def block_transactions_component(
+    request: Request, hash: str, db: Session = Depends(get_db)
+):
     """HTMX компонент транзакций блока"""
-    db = next(get_db())
-
     # Получаем транзакции блока напрямую из БД
     from app.models.transaction import Transaction
 
@@ -223,13 +224,14 @@ async def block_transactions_component(request: Request, hash: str):
 
 
 @app.get("/components/address-transactions", response_class=HTMLResponse)
-async def address_transactions_component(request: Request, address: str):
+async def address_transactions_component(
+    request: Request, address: str, db: Session = Depends(get_db)
+):
     """HTMX компонент транзакций адреса"""
-    db = next(get_db())
     tx_service = TransactionService(db)
 
     # get_transactions_by_address возвращает словарь с ключом 'transactions'
-    result = tx_service.get_transactions_by_address(address, page=1, per_page=50)
+    result = tx_service.get_transactions_by_address(address, per_page=50)
     transactions = result["transactions"]
 
     return templates.TemplateResponse(
@@ -16,6 +16,8 @@ class Address(Base):
     id = Column(Integer, primary_key=True, index=True)
     address = Column(String(64), unique=True, nullable=False, index=True)
     balance = Column(BigInteger, default=0)  # Баланс в сатоши
+    total_received = Column(BigInteger, default=0)  # Всего получено в сатоши
+    total_spent = Column(BigInteger, default=0)  # Всего потрачено в сатоши
     tx_count = Column(Integer, default=0)  # Количество транзакций
     first_seen_block = Column(Integer, index=True)  # Первое появление
     last_seen_block = Column(Integer, index=True)  # Последнее появление
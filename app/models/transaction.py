@@ -2,7 +2,16 @@
 SQLAlchemy модели для транзакций Bitcoin
 """
 
-from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -26,6 +35,27 @@ class Transaction(Base):
     fee = Column(BigInteger)  # Комиссия в сатоши
     created_at = Column(DateTime, default=func.now())
 
+    __table_args__ = (
+        # Под сортировку пагинации (block_height DESC NULLS LAST, id DESC)
+        Index(
+            "ix_transactions_block_height_id_desc",
+            block_height.desc().nulls_last(),
+            id.desc(),
+        ).ddl_if(dialect="postgresql"),
+        # Частичный индекс для неподтвержденных транзакций (мемпул)
+        Index(
+            "ix_transactions_unconfirmed_id_desc",
+            id.desc(),
+            postgresql_where=block_hash.is_(None),
+        ).ddl_if(dialect="postgresql"),
+        # Префиксный поиск LIKE 'abc%' при не-C collation
+        Index(
+            "ix_transactions_txid_prefix",
+            txid,
+            postgresql_ops={"txid": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     # Связи
     block = relationship("Block", back_populates="transactions")
     inputs = relationship(
@@ -68,7 +98,16 @@ class TransactionOutput(Base):
     n = Column(Integer)  # Индекс выхода в транзакции
     value = Column(BigInteger)  # Значение в сатоши
     script_pubkey = Column(Text)  # Скрипт публичного ключа
-    address = Column(String(64), index=True)  # Bitcoin адрес
+    address = Column(String(64))  # Bitcoin адрес
+
+    __table_args__ = (
+        # Покрывающий индекс: выборки по адресу обходятся без чтения таблицы
+        Index(
+            "ix_transaction_outputs_address",
+            address,
+            postgresql_include=["transaction_id", "n", "value"],
+        ),
+    )
 
     # Связь с транзакцией
     transaction = relationship("Transaction", back_populates="outputs")
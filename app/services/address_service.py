@@ -5,13 +5,14 @@
 import logging
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import desc
+from sqlalchemy import case, desc, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.address import Address
-from app.models.transaction import TransactionInput, TransactionOutput
+from app.models.transaction import TransactionOutput
+from app.services.transaction_service import TransactionService
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class AddressService:
 
     def __init__(self, db: Session):
         self.db = db
+        self.transaction_service = TransactionService(db)
 
     def get_address(self, address: str) -> Optional[Address]:
         """
@@ -73,7 +75,6 @@ class AddressService:
                 # Пересчитываем баланс и количество транзакций
                 self._update_address_stats(existing_address)
                 self.db.commit()
-                self.db.refresh(existing_address)
                 return existing_address
             else:
                 # Создаем новый адрес
@@ -85,13 +86,11 @@ class AddressService:
                     last_seen_block=block_height,
                 )
                 self.db.add(new_address)
-                self.db.commit()
-                self.db.refresh(new_address)
+                self.db.flush()
 
-                # Обновляем статистику
+                # Обновляем статистику и сохраняем адрес одним коммитом
                 self._update_address_stats(new_address)
                 self.db.commit()
-                self.db.refresh(new_address)
                 return new_address
 
         except IntegrityError as e:
@@ -116,43 +115,15 @@ class AddressService:
             address: Объект адреса для обновления
         """
         try:
-            # Получаем все выходы для этого адреса
-            outputs = (
-                self.db.query(TransactionOutput)
-                .filter(TransactionOutput.address == address.address)
-                .all()
-            )
-
-            # Получаем потраченные выходы
-            spent_outputs = set()
-            for output in outputs:
-                spent_input = (
-                    self.db.query(TransactionInput)
-                    .filter(
-                        TransactionInput.prev_txid == output.transaction.txid,
-                        TransactionInput.vout == output.n,
-                    )
-                    .first()
-                )
-                if spent_input:
-                    spent_outputs.add((output.transaction.txid, output.n))
-
-            # Вычисляем баланс
-            total_received = sum(output.value for output in outputs)
-            total_spent = sum(
-                output.value
-                for output in outputs
-                if (output.transaction.txid, output.n) in spent_outputs
-            )
-            balance = total_received - total_spent
-
-            # Подсчитываем уникальные транзакции
-            unique_txids = set(output.transaction.txid for output in outputs)
-            tx_count = len(unique_txids)
+            # Суммы и количество транзакций считаются одним агрегатным
+            # запросом с тем же условием траты, что и инкрементальный учет
+            stats = self.transaction_service._calculate_address_balance(address.address)
 
             # Обновляем адрес
-            address.balance = balance
-            address.tx_count = tx_count
+            address.balance = stats["balance"]
+            address.total_received = stats["total_received"]
+            address.total_spent = stats["total_spent"]
+            address.tx_count = stats["tx_count"]
 
         except Exception as e:
             logger.error(
@@ -160,6 +131,48 @@ class AddressService:
             )
             raise AddressServiceError(f"Не удалось обновить статистику адреса: {e}")
 
+    def update_seen_blocks(self, addresses: List[str], block_height: int) -> int:
+        """
+        Обновление блоков первого/последнего появления адресов
+
+        Балансы и счетчики ведутся инкрементально при сохранении транзакций,
+        поэтому здесь они не пересчитываются.
+
+        Args:
+            addresses: Bitcoin адреса
+            block_height: Высота блока
+
+        Returns:
+            Количество обновленных адресов
+        """
+        if not addresses:
+            return 0
+
+        try:
+            result = self.db.execute(
+                update(Address)
+                .where(Address.address.in_(set(addresses)))
+                .values(
+                    first_seen_block=case(
+                        (Address.first_seen_block.is_(None), block_height),
+                        (Address.first_seen_block > block_height, block_height),
+                        else_=Address.first_seen_block,
+                    ),
+                    last_seen_block=case(
+                        (Address.last_seen_block.is_(None), block_height),
+                        (Address.last_seen_block < block_height, block_height),
+                        else_=Address.last_seen_block,
+                    ),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            return result.rowcount
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Ошибка обновления блоков появления адресов: {e}")
+            raise AddressServiceError(f"Не удалось обновить адреса: {e}")
+
     def sync_address_from_outputs(
         self, address_str: str, block_height: Optional[int] = None
     ) -> Address:
@@ -2,11 +2,15 @@
 Bitcoin RPC клиент для взаимодействия с Bitcoin Core
 """
 
+import asyncio
+import copy
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
 
+from app.cache import LRUCache
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -24,9 +28,23 @@ class BitcoinRPCClient:
     """
 
     def __init__(self):
-        self._connection = None
+        # AuthServiceProxy держит одно HTTP-соединение и не потокобезопасен,
+        # поэтому каждому потоку (в т.ч. из asyncio.to_thread) выдаем свое
+        self._local = threading.local()
+        # Подтвержденные транзакции неизменны (кроме реорганизаций),
+        # поэтому повторные getrawtransaction можно отдавать из памяти
+        self._tx_cache = LRUCache(maxsize=settings.BITCOIN_RPC_TX_CACHE_SIZE)
         self._connect()
 
+    @property
+    def _connection(self) -> Optional[AuthServiceProxy]:
+        """Подключение к Bitcoin Core для текущего потока"""
+        return getattr(self._local, "connection", None)
+
+    @_connection.setter
+    def _connection(self, value: Optional[AuthServiceProxy]) -> None:
+        self._local.connection = value
+
     def _connect(self) -> None:
         """Создание подключения к Bitcoin Core"""
         try:
@@ -90,6 +108,48 @@ class BitcoinRPCClient:
                         f"Максимальное количество попыток исчерпано: {e}"
                     )
 
+    def _execute_batch(self, calls: List[Tuple[str, list]]) -> List[Any]:
+        """
+        Отправка пакета RPC вызовов одним HTTP POST
+
+        batch_ прерывается на первой ошибке в пакете (например, транзакция
+        уже покинула мемпул), поэтому вызывающие выполняют вызовы по одному
+        """
+        if not self._connection:
+            self._connect()
+        return self._connection.batch_([[method, *params] for method, params in calls])
+
+    async def batch_call_async(self, calls: List[Tuple[str, list]]) -> List[Any]:
+        """
+        Пакетный RPC вызов вне event loop; если пакет не удался,
+        вызовы выполняются параллельно в пуле потоков
+
+        Args:
+            calls: Список пар (метод, параметры)
+
+        Returns:
+            Результаты в порядке вызовов (None для вызовов с ошибкой)
+        """
+        if not calls:
+            return []
+
+        try:
+            return await asyncio.to_thread(self._execute_batch, calls)
+        except Exception as e:
+            logger.warning(f"Пакетный RPC вызов не удался, выполняем параллельно: {e}")
+
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(self._execute_rpc_call, method, *params)
+                for method, params in calls
+            ),
+            return_exceptions=True,
+        )
+        for (method, _), result in zip(calls, results):
+            if isinstance(result, Exception):
+                logger.warning(f"RPC ошибка в пакете для {method}: {result}")
+        return [None if isinstance(r, Exception) else r for r in results]
+
     # Методы для работы с блокчейном
 
     def get_blockchain_info(self) -> Dict[str, Any]:
@@ -145,12 +205,28 @@ class BitcoinRPCClient:
             verbose: Возвращать JSON вместо hex
             block_hash: Хеш блока (для ускорения поиска)
         """
+        if verbose:
+            cached_tx = self._tx_cache.get(txid)
+            if cached_tx is not None:
+                # Отдаем копию: вызывающие дополняют словарь данными блока
+                return copy.deepcopy(cached_tx)
+
         if block_hash:
-            return self._execute_rpc_call(
+            tx_data = self._execute_rpc_call(
                 "getrawtransaction", txid, verbose, block_hash
             )
         else:
-            return self._execute_rpc_call("getrawtransaction", txid, verbose)
+            tx_data = self._execute_rpc_call("getrawtransaction", txid, verbose)
+
+        # Кэшируем только подтвержденные транзакции: данные из мемпула меняются
+        if verbose and isinstance(tx_data, dict) and tx_data.get("blockhash"):
+            self._tx_cache.set(txid, copy.deepcopy(tx_data))
+
+        return tx_data
+
+    def clear_transaction_cache(self) -> None:
+        """Очистка кэша транзакций (например, после реорганизации)"""
+        self._tx_cache.clear()
 
     def get_transaction(self, txid: str) -> Dict[str, Any]:
         """Получение информации о транзакции (из кошелька)"""
@@ -253,7 +329,7 @@ class BitcoinRPCClient:
     async def test_connection(self) -> bool:
         """Тестирование подключения к Bitcoin Core"""
         try:
-            self.get_blockchain_info()
+            await asyncio.to_thread(self.get_blockchain_info)
             return True
         except Exception as e:
             logger.error(f"Тест подключения неудачен: {e}")
@@ -2,6 +2,7 @@
 Сервис для работы с блоками Bitcoin
 """
 
+import asyncio
 import logging
 from typing import Any, Dict, List, Optional
 
@@ -200,12 +201,16 @@ class BlockService:
             )
             raise BlockServiceError(f"Неожиданная ошибка: {e}")
 
-    async def save_block_to_db(self, block_data: Dict[str, Any]) -> Block:
+    async def save_block_to_db(
+        self, block_data: Dict[str, Any], commit: bool = True
+    ) -> Block:
         """
         Сохранение блока в БД
 
         Args:
             block_data: Данные блока из RPC
+            commit: Фиксировать транзакцию БД; при False блок только
+                отправляется в БД и фиксируется вместе с его транзакциями
         """
         try:
             # Проверяем, существует ли блок
@@ -233,8 +238,10 @@ class BlockService:
             )
 
             self.db.add(block)
-            self.db.commit()
-            self.db.refresh(block)
+            if commit:
+                self.db.commit()
+            else:
+                self.db.flush()
 
             logger.info(f"Блок {block.hash} успешно сохранен в БД")
             return block
@@ -263,7 +270,9 @@ class BlockService:
 
             # Если не найден в БД, получаем через RPC и сохраняем
             logger.info(f"Блок {hash_or_height} не найден в БД, получаем через RPC")
-            block_data = self.fetch_block_from_rpc(hash_or_height)
+            block_data = await asyncio.to_thread(
+                self.fetch_block_from_rpc, hash_or_height
+            )
             return await self.save_block_to_db(block_data)
 
         except Exception as e:
@@ -4,13 +4,15 @@
 
 import asyncio
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List
 
+from sqlalchemy import delete, func, select, tuple_
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.block import Block
-from app.models.transaction import Transaction
+from app.models.transaction import Transaction, TransactionInput, TransactionOutput
 from app.services.address_service import AddressService
 from app.services.bitcoin_rpc import BitcoinRPCError, bitcoin_rpc
 from app.services.block_service import BlockService
@@ -28,25 +30,38 @@ class SyncServiceError(Exception):
 class SyncService:
     """Сервис синхронизации с Bitcoin блокчейном"""
 
+    # Границы и целевое время батча для full_sync
+    MIN_BATCH_SIZE = 10
+    MAX_BATCH_SIZE = 1000
+    TARGET_BATCH_SECONDS = 30.0
+
+    # Как часто full_sync перечитывает высоту сети: в батчах и в секундах
+    TIP_PROBE_BATCHES = 100
+    TIP_PROBE_INTERVAL = 60.0
+
+    # Общая для всех экземпляров блокировка: сервис создается на каждый
+    # запрос/итерацию, поэтому флаг экземпляра не защищал от параллельных синхронизаций
+    _sync_lock = asyncio.Lock()
+
     def __init__(self, db: Session):
         self.db = db
         self.block_service = BlockService(db)
         self.transaction_service = TransactionService(db)
         self.address_service = AddressService(db)
-        self._is_syncing = False
         self._sync_stats = {
             "blocks_synced": 0,
             "transactions_synced": 0,
             "addresses_synced": 0,
             "errors": 0,
-            "last_sync_time": None,
+            "last_sync_time": None,  # time.monotonic()
+            "last_sync_timestamp": None,  # Unix timestamp для отображения
             "sync_progress": 0.0,
         }
 
     @property
     def is_syncing(self) -> bool:
         """Проверка, идет ли синхронизация"""
-        return self._is_syncing
+        return self._sync_lock.locked()
 
     @property
     def sync_stats(self) -> Dict[str, Any]:
@@ -75,7 +90,7 @@ class SyncService:
                 progress = 0
 
             status = {
-                "is_syncing": self._is_syncing,
+                "is_syncing": self.is_syncing,
                 "network_height": network_height,
                 "db_height": db_height,
                 "blocks_behind": max(0, network_height - db_height),
@@ -101,127 +116,179 @@ class SyncService:
         Returns:
             Результат синхронизации
         """
-        if self._is_syncing:
+        if self._sync_lock.locked():
             raise SyncServiceError("Синхронизация уже выполняется")
 
-        self._is_syncing = True
-        synced_blocks = 0
-        synced_transactions = 0
-        errors = 0
+        async with self._sync_lock:
+            try:
+                # Получаем текущую высоту блокчейна
+                network_height = await asyncio.to_thread(bitcoin_rpc.get_block_count)
+                db_height = self.block_service.get_latest_block_height()
 
-        try:
-            # Получаем текущую высоту блокчейна
-            network_height = bitcoin_rpc.get_block_count()
-            db_height = self.block_service.get_latest_block_height()
+                logger.info(
+                    f"Начинаем синхронизацию: сеть={network_height}, БД={db_height}"
+                )
 
-            logger.info(
-                f"Начинаем синхронизацию: сеть={network_height}, БД={db_height}"
-            )
+                # Определяем блоки для синхронизации
+                start_height = db_height + 1
+                end_height = min(start_height + max_blocks - 1, network_height)
 
-            # Определяем блоки для синхронизации
-            start_height = db_height + 1
-            end_height = min(start_height + max_blocks - 1, network_height)
+                if start_height > network_height:
+                    logger.info("База данных уже синхронизирована")
+                    return {
+                        "synced_blocks": 0,
+                        "synced_transactions": 0,
+                        "errors": 0,
+                        "message": "Уже синхронизировано",
+                    }
 
-            if start_height > network_height:
-                logger.info("База данных уже синхронизирована")
-                return {
-                    "synced_blocks": 0,
-                    "synced_transactions": 0,
-                    "errors": 0,
-                    "message": "Уже синхронизировано",
-                }
+                result = await self._sync_range(start_height, end_height)
 
-            # Синхронизируем блоки
-            for height in range(start_height, end_height + 1):
-                try:
-                    # Получаем блок через RPC
-                    block_data = self.block_service.fetch_block_from_rpc(height)
+                logger.info(
+                    f"Синхронизация завершена: блоков={result['synced_blocks']}, "
+                    f"транзакций={result['synced_transactions']}, "
+                    f"ошибок={result['errors']}"
+                )
 
-                    # Сохраняем блок
-                    await self.block_service.save_block_to_db(block_data)
-                    synced_blocks += 1
-
-                    # Сохраняем транзакции блока
-                    if "tx" in block_data:
-                        for tx_data in block_data["tx"]:
-                            if isinstance(tx_data, str):
-                                # Если tx - это только txid, получаем полные данные
-                                try:
-                                    full_tx_data = bitcoin_rpc.get_raw_transaction(
-                                        tx_data, verbose=True
-                                    )
-                                    # Добавляем информацию о блоке
-                                    full_tx_data["blockhash"] = block_data["hash"]
-                                    full_tx_data["blockheight"] = block_data["height"]
-                                    self.transaction_service.save_transaction_to_db(
-                                        full_tx_data
-                                    )
-                                    synced_transactions += 1
-
-                                    # Синхронизируем адреса из выходов транзакции
-                                    self._sync_addresses_from_transaction(
-                                        full_tx_data, block_data["height"]
-                                    )
-                                except Exception as tx_error:
-                                    logger.warning(
-                                        f"Ошибка синхронизации транзакции {tx_data}: "
-                                        f"{tx_error}"
-                                    )
-                                    errors += 1
-                            else:
-                                # Уже полные данные транзакции
-                                try:
-                                    # Добавляем информацию о блоке, если её нет
-                                    if "blockhash" not in tx_data:
-                                        tx_data["blockhash"] = block_data["hash"]
-                                    if "blockheight" not in tx_data:
-                                        tx_data["blockheight"] = block_data["height"]
-                                    self.transaction_service.save_transaction_to_db(
-                                        tx_data
-                                    )
-                                    synced_transactions += 1
-
-                                    # Синхронизируем адреса из выходов транзакции
-                                    self._sync_addresses_from_transaction(
-                                        tx_data, block_data["height"]
-                                    )
-                                except Exception as tx_error:
-                                    logger.warning(
-                                        f"Ошибка синхронизации транзакции: {tx_error}"
-                                    )
-                                    errors += 1
-
-                    logger.info(f"Синхронизирован блок {height}")
-
-                except Exception as block_error:
-                    logger.error(f"Ошибка синхронизации блока {height}: {block_error}")
-                    errors += 1
-                    continue
+                result["message"] = (
+                    f"Синхронизировано блоков: {result['synced_blocks']}"
+                )
+                return result
 
-            # Обновляем статистику
-            self._sync_stats["blocks_synced"] += synced_blocks
-            self._sync_stats["transactions_synced"] += synced_transactions
-            self._sync_stats["errors"] += errors
-            self._sync_stats["last_sync_time"] = asyncio.get_event_loop().time()
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации: {e}")
+                raise SyncServiceError(f"Ошибка синхронизации: {e}")
 
-            logger.info(
-                f"Синхронизация завершена: блоков={synced_blocks}, "
-                f"транзакций={synced_transactions}, ошибок={errors}"
-            )
+    async def _sync_range(self, start_height: int, end_height: int) -> Dict[str, Any]:
+        """
+        Загрузка и сохранение блоков в диапазоне высот
 
-            return {
-                "synced_blocks": synced_blocks,
-                "synced_transactions": synced_transactions,
-                "errors": errors,
-                "message": f"Синхронизировано блоков: {synced_blocks}",
-            }
+        Не проверяет флаг синхронизации и не запрашивает высоты сети/БД —
+        это делают вызывающие методы.
 
-        except Exception as e:
-            logger.error(f"Ошибка синхронизации: {e}")
-            raise SyncServiceError(f"Ошибка синхронизации: {e}")
+        Args:
+            start_height: Первая высота диапазона
+            end_height: Последняя высота диапазона (включительно)
+
+        Returns:
+            Количество синхронизированных блоков, транзакций и ошибок
+        """
+        synced_blocks = 0
+        synced_transactions = 0
+        errors = 0
+
+        for height in range(start_height, end_height + 1):
+            try:
+                # Получаем блок через RPC
+                block_data = await asyncio.to_thread(
+                    self.block_service.fetch_block_from_rpc, height
+                )
 
-        finally:
-            self._is_syncing = False
+                # Транзакции блока загружаем до записи в БД, чтобы не держать
+                # транзакцию БД открытой во время RPC вызовов
+                block_txs = []
+                if "tx" in block_data:
+                    # Транзакции, переданные только txid, получаем параллельно
+                    txids = [tx for tx in block_data["tx"] if isinstance(tx, str)]
+                    fetched = dict(
+                        zip(txids, await self._fetch_raw_transactions(txids))
+                    )
+
+                    for tx_data in block_data["tx"]:
+                        if isinstance(tx_data, str):
+                            # Если tx - это только txid, берем полные данные
+                            full_tx_data = fetched[tx_data]
+                            if isinstance(full_tx_data, Exception):
+                                logger.warning(
+                                    f"Ошибка синхронизации транзакции {tx_data}: "
+                                    f"{full_tx_data}"
+                                )
+                                errors += 1
+                                continue
+                            tx_data = full_tx_data
+                            # Добавляем информацию о блоке
+                            tx_data["blockhash"] = block_data["hash"]
+                            tx_data["blockheight"] = block_data["height"]
+                        else:
+                            # Уже полные данные транзакции
+                            # Добавляем информацию о блоке, если её нет
+                            if "blockhash" not in tx_data:
+                                tx_data["blockhash"] = block_data["hash"]
+                            if "blockheight" not in tx_data:
+                                tx_data["blockheight"] = block_data["height"]
+                        block_txs.append(tx_data)
+
+                # Блок и все его транзакции сохраняются одним коммитом
+                await self.block_service.save_block_to_db(
+                    block_data, commit=not block_txs
+                )
+                try:
+                    self.transaction_service.save_transactions_bulk(block_txs)
+                    synced_transactions += len(block_txs)
+                except Exception as tx_error:
+                    # Откат убрал и блок: сохраняем его отдельно, а транзакции
+                    # по одной, чтобы потерять только ошибочные
+                    logger.warning(
+                        f"Ошибка пакетного сохранения транзакций блока {height}, "
+                        f"сохраняем по одной: {tx_error}"
+                    )
+                    await self.block_service.save_block_to_db(block_data)
+                    saved_txs = []
+                    for tx_data in block_txs:
+                        try:
+                            self.transaction_service.save_transaction_to_db(tx_data)
+                            saved_txs.append(tx_data)
+                        except Exception as single_error:
+                            logger.warning(
+                                f"Ошибка синхронизации транзакции "
+                                f"{tx_data.get('txid')}: {single_error}"
+                            )
+                            errors += 1
+                    synced_transactions += len(saved_txs)
+                    block_txs = saved_txs
+                synced_blocks += 1
+
+                # Балансы адресов уже учтены при сохранении транзакций,
+                # обновляем только блоки их появления
+                self._sync_addresses_from_block(block_txs, block_data["height"])
+
+                logger.info(f"Синхронизирован блок {height}")
+
+            except Exception as block_error:
+                logger.error(f"Ошибка синхронизации блока {height}: {block_error}")
+                errors += 1
+                continue
+
+        # Обновляем статистику
+        self._sync_stats["blocks_synced"] += synced_blocks
+        self._sync_stats["transactions_synced"] += synced_transactions
+        self._sync_stats["errors"] += errors
+        self._sync_stats["last_sync_time"] = time.monotonic()
+        self._sync_stats["last_sync_timestamp"] = time.time()
+
+        return {
+            "synced_blocks": synced_blocks,
+            "synced_transactions": synced_transactions,
+            "errors": errors,
+        }
+
+    async def _fetch_raw_transactions(self, txids: List[str]) -> List[Any]:
+        """
+        Параллельное получение транзакций через RPC вне event loop
+
+        Args:
+            txids: Список ID транзакций
+
+        Returns:
+            Данные транзакций или исключения в порядке txids
+        """
+        return await asyncio.gather(
+            *(
+                asyncio.to_thread(bitcoin_rpc.get_raw_transaction, txid, True)
+                for txid in txids
+            ),
+            return_exceptions=True,
+        )
 
     async def sync_mempool(self) -> Dict[str, Any]:
         """
@@ -234,7 +301,9 @@ class SyncService:
             logger.info("Начинаем синхронизацию мемпула")
 
             # Получаем транзакции из мемпула
-            mempool_transactions = self.transaction_service.get_mempool_transactions()
+            mempool_transactions = (
+                await self.transaction_service.get_mempool_transactions()
+            )
             synced_count = 0
             skipped_count = 0
             errors = 0
@@ -290,86 +359,122 @@ class SyncService:
         Полная синхронизация с блокчейном
 
         Args:
-            batch_size: Размер батча для синхронизации
+            batch_size: Начальный размер батча, далее подстраивается
+                под фактическое время обработки блока
 
         Returns:
             Результат полной синхронизации
         """
-        if self._is_syncing:
+        if self._sync_lock.locked():
             raise SyncServiceError("Синхронизация уже выполняется")
 
-        self._is_syncing = True
-        total_synced_blocks = 0
-        total_synced_transactions = 0
-        total_errors = 0
+        async with self._sync_lock:
+            total_synced_blocks = 0
+            total_synced_transactions = 0
+            total_errors = 0
 
-        try:
-            # Получаем информацию о текущем состоянии
-            network_height = bitcoin_rpc.get_block_count()
-            db_height = self.block_service.get_latest_block_height()
+            try:
+                # Получаем информацию о текущем состоянии
+                network_height = await asyncio.to_thread(bitcoin_rpc.get_block_count)
+                db_height = self.block_service.get_latest_block_height()
 
-            logger.info(
-                f"Начинаем полную синхронизацию: сеть={network_height}, БД={db_height}"
-            )
+                logger.info(
+                    f"Начинаем полную синхронизацию: сеть={network_height}, БД={db_height}"
+                )
 
-            if db_height >= network_height:
-                logger.info("База данных уже синхронизирована")
-                return {
-                    "synced_blocks": 0,
-                    "synced_transactions": 0,
-                    "errors": 0,
-                    "message": "Уже синхронизировано",
-                }
+                if db_height >= network_height:
+                    logger.info("База данных уже синхронизирована")
+                    return {
+                        "synced_blocks": 0,
+                        "synced_transactions": 0,
+                        "errors": 0,
+                        "message": "Уже синхронизировано",
+                    }
+
+                # Синхронизируем батчами; высоты сети и БД держим локально,
+                # сеть опрашиваем повторно лишь периодически
+                start_height = db_height + 1
+                batches = 0
+                last_probe = time.monotonic()
+
+                while start_height <= network_height:
+                    end_height = min(start_height + batch_size - 1, network_height)
+
+                    # Синхронизируем батч
+                    batch_started = time.monotonic()
+                    result = await self._sync_range(start_height, end_height)
+                    batch_size = self._adapt_batch_size(
+                        batch_size,
+                        end_height - start_height + 1,
+                        time.monotonic() - batch_started,
+                    )
 
-            # Синхронизируем батчами
-            start_height = db_height + 1
+                    total_synced_blocks += result["synced_blocks"]
+                    total_synced_transactions += result["synced_transactions"]
+                    total_errors += result["errors"]
+                    db_height += result["synced_blocks"]
 
-            while start_height <= network_height:
-                end_height = min(start_height + batch_size - 1, network_height)
+                    # Обновляем прогресс
+                    progress = db_height / network_height * 100
+                    self._sync_stats["sync_progress"] = round(progress, 2)
 
-                # Синхронизируем батч
-                result = await self.sync_latest_blocks(
-                    max_blocks=end_height - start_height + 1
-                )
+                    logger.info(
+                        f"Прогресс синхронизации: {progress:.1f}% "
+                        f"({db_height}/{network_height})"
+                    )
 
-                total_synced_blocks += result["synced_blocks"]
-                total_synced_transactions += result["synced_transactions"]
-                total_errors += result["errors"]
+                    start_height = end_height + 1
+                    batches += 1
 
-                # Обновляем прогресс
-                progress = (
-                    (start_height + result["synced_blocks"]) / network_height * 100
-                )
-                self._sync_stats["sync_progress"] = round(progress, 2)
+                    # Подхватываем новые блоки, появившиеся во время синхронизации
+                    if (
+                        batches % self.TIP_PROBE_BATCHES == 0
+                        or time.monotonic() - last_probe >= self.TIP_PROBE_INTERVAL
+                    ):
+                        network_height = await asyncio.to_thread(
+                            bitcoin_rpc.get_block_count
+                        )
+                        last_probe = time.monotonic()
+
+                    # Небольшая пауза между батчами
+                    await asyncio.sleep(0.1)
 
                 logger.info(
-                    f"Прогресс синхронизации: {progress:.1f}% "
-                    f"({start_height + result['synced_blocks']}/{network_height})"
+                    f"Полная синхронизация завершена: блоков={total_synced_blocks}, "
+                    f"транзакций={total_synced_transactions}, ошибок={total_errors}"
                 )
 
-                start_height = end_height + 1
+                return {
+                    "synced_blocks": total_synced_blocks,
+                    "synced_transactions": total_synced_transactions,
+                    "errors": total_errors,
+                    "message": "Полная синхронизация завершена",
+                }
 
-                # Небольшая пауза между батчами
-                await asyncio.sleep(0.1)
+            except Exception as e:
+                logger.error(f"Ошибка полной синхронизации: {e}")
+                raise SyncServiceError(f"Ошибка полной синхронизации: {e}")
 
-            logger.info(
-                f"Полная синхронизация завершена: блоков={total_synced_blocks}, "
-                f"транзакций={total_synced_transactions}, ошибок={total_errors}"
-            )
+    def _adapt_batch_size(
+        self, batch_size: int, batch_blocks: int, elapsed: float
+    ) -> int:
+        """
+        Подбор размера следующего батча по времени обработки текущего
 
-            return {
-                "synced_blocks": total_synced_blocks,
-                "synced_transactions": total_synced_transactions,
-                "errors": total_errors,
-                "message": "Полная синхронизация завершена",
-            }
+        Args:
+            batch_size: Текущий размер батча
+            batch_blocks: Количество блоков в обработанном батче
+            elapsed: Время обработки батча в секундах
 
-        except Exception as e:
-            logger.error(f"Ошибка полной синхронизации: {e}")
-            raise SyncServiceError(f"Ошибка полной синхронизации: {e}")
+        Returns:
+            Размер следующего батча
+        """
+        if batch_blocks <= 0 or elapsed <= 0:
+            return batch_size
 
-        finally:
-            self._is_syncing = False
+        per_block = elapsed / batch_blocks
+        target = int(self.TARGET_BATCH_SECONDS / per_block)
+        return max(self.MIN_BATCH_SIZE, min(self.MAX_BATCH_SIZE, target))
 
     async def handle_reorg(self, new_tip_hash: str) -> Dict[str, Any]:
         """
@@ -387,13 +492,17 @@ class SyncService:
             )
 
             # Получаем информацию о новом верхнем блоке
-            new_tip_data = bitcoin_rpc.get_block(new_tip_hash, verbosity=1)
+            new_tip_data = await asyncio.to_thread(
+                bitcoin_rpc.get_block, new_tip_hash, 1
+            )
             new_height = new_tip_data["height"]
 
             # Находим общий предок
             common_height = new_height
             while common_height > 0:
-                block_hash = bitcoin_rpc.get_block_hash(common_height)
+                block_hash = await asyncio.to_thread(
+                    bitcoin_rpc.get_block_hash, common_height
+                )
                 db_block = await self.block_service.get_block_by_height(common_height)
 
                 if db_block and db_block.hash == block_hash:
@@ -404,23 +513,67 @@ class SyncService:
 
             logger.info(f"Общий предок найден на высоте {common_height}")
 
-            # Удаляем блоки после общего предка
-            orphaned_blocks = (
-                self.db.query(Block).filter(Block.height > common_height).all()
+            # Удаляем данные после общего предка набором запросов по таблицам,
+            # без загрузки орфанных блоков в сессию
+            orphaned_hashes = select(Block.hash).where(Block.height > common_height)
+            orphaned_tx_ids = select(Transaction.id).where(
+                Transaction.block_hash.in_(orphaned_hashes)
+            )
+            no_sync = {"synchronize_session": False}
+
+            # Адреса, чьи сводные балансы затронуты орфанными транзакциями:
+            # получатели их выходов и владельцы потраченных ими выходов
+            orphaned_inputs = select(
+                TransactionInput.prev_txid, TransactionInput.vout
+            ).where(TransactionInput.transaction_id.in_(orphaned_tx_ids))
+            affected_addresses = set(
+                self.db.scalars(
+                    select(TransactionOutput.address)
+                    .join(
+                        Transaction, TransactionOutput.transaction_id == Transaction.id
+                    )
+                    .where(
+                        TransactionOutput.address.isnot(None),
+                        TransactionOutput.transaction_id.in_(orphaned_tx_ids)
+                        | tuple_(Transaction.txid, TransactionOutput.n).in_(
+                            orphaned_inputs
+                        ),
+                    )
+                    .distinct()
+                )
             )
 
-            orphaned_count = len(orphaned_blocks)
-            for block in orphaned_blocks:
-                # Удаляем связанные транзакции
-                self.db.query(Transaction).filter(
-                    Transaction.block_hash == block.hash
-                ).delete()
-
-                # Удаляем блок
-                self.db.delete(block)
+            self.db.execute(
+                delete(TransactionInput).where(
+                    TransactionInput.transaction_id.in_(orphaned_tx_ids)
+                ),
+                execution_options=no_sync,
+            )
+            self.db.execute(
+                delete(TransactionOutput).where(
+                    TransactionOutput.transaction_id.in_(orphaned_tx_ids)
+                ),
+                execution_options=no_sync,
+            )
+            self.db.execute(
+                delete(Transaction).where(Transaction.block_hash.in_(orphaned_hashes)),
+                execution_options=no_sync,
+            )
+            orphaned_count = self.db.execute(
+                delete(Block).where(Block.height > common_height),
+                execution_options=no_sync,
+            ).rowcount
 
             self.db.commit()
 
+            # Пересчитываем сводные балансы затронутых адресов
+            for address in affected_addresses:
+                self.address_service.sync_address_from_outputs(address)
+
+            # Закэшированные транзакции могут ссылаться на орфанные блоки
+            bitcoin_rpc.clear_transaction_cache()
+            self.transaction_service.clear_transaction_cache()
+
             logger.info(f"Удалено {orphaned_count} орфанных блоков")
 
             return {
@@ -443,7 +596,7 @@ class SyncService:
         """
         try:
             # Получаем текущую высоту сети
-            network_height = bitcoin_rpc.get_block_count()
+            network_height = await asyncio.to_thread(bitcoin_rpc.get_block_count)
 
             # Получаем последние несколько блоков из БД
             recent_blocks = (
@@ -465,7 +618,9 @@ class SyncService:
 
                 try:
                     # Получаем хеш блока на этой высоте из сети
-                    network_hash = bitcoin_rpc.get_block_hash(block.height)
+                    network_hash = await asyncio.to_thread(
+                        bitcoin_rpc.get_block_hash, block.height
+                    )
 
                     if network_hash != block.hash:
                         logger.warning(
@@ -499,26 +654,36 @@ class SyncService:
             checked_blocks = 0
             checked_transactions = 0
 
-            # Проверяем блоки
-            blocks = self.db.query(Block).order_by(Block.height).all()
+            # Проверяем блоки, читая их потоком, а не загружая все сразу
+            blocks = (
+                self.db.query(Block)
+                .order_by(Block.height)
+                .execution_options(stream_results=True)
+                .yield_per(10000)
+            )
+            prev_height = None
+            prev_hash = None
 
-            for i, block in enumerate(blocks):
+            for block in blocks:
                 checked_blocks += 1
 
                 # Проверяем последовательность высот
-                if i > 0 and block.height != blocks[i - 1].height + 1:
-                    issues.append(f"Пропущена высота блока: {blocks[i - 1].height + 1}")
+                if prev_height is not None and block.height != prev_height + 1:
+                    issues.append(f"Пропущена высота блока: {prev_height + 1}")
 
                 # Проверяем связи previous_block_hash
                 if (
-                    i > 0
+                    prev_hash is not None
                     and block.previous_block_hash
-                    and block.previous_block_hash != blocks[i - 1].hash
+                    and block.previous_block_hash != prev_hash
                 ):
                     issues.append(
                         f"Неверный previous_block_hash в блоке {block.height}"
                     )
 
+                prev_height = block.height
+                prev_hash = block.hash
+
                 # Проверяем транзакции блока
                 tx_count = (
                     self.db.query(Transaction)
@@ -533,13 +698,12 @@ class SyncService:
                     )
 
             # Проверяем транзакции
+            # Anti-join вместо NOT IN: планировщик использует индекс по block_hash
             orphaned_transactions = (
-                self.db.query(Transaction)
-                .filter(
-                    Transaction.block_hash.isnot(None),
-                    ~Transaction.block_hash.in_(self.db.query(Block.hash)),
-                )
-                .count()
+                self.db.query(func.count(Transaction.id))
+                .outerjoin(Block, Block.hash == Transaction.block_hash)
+                .filter(Transaction.block_hash.isnot(None), Block.hash.is_(None))
+                .scalar()
             )
 
             if orphaned_transactions > 0:
@@ -568,42 +732,37 @@ class SyncService:
             logger.error(f"Ошибка валидации БД: {e}")
             raise SyncServiceError(f"Ошибка валидации БД: {e}")
 
-    def _sync_addresses_from_transaction(
-        self, tx_data: Dict[str, Any], block_height: int
+    def _sync_addresses_from_block(
+        self, block_txs: List[Dict[str, Any]], block_height: int
     ) -> None:
         """
-        Синхронизация адресов из транзакции
+        Обновление блоков появления адресов из выходов транзакций блока
+
+        Полный пересчет статистики адресов выполняется только при
+        реорганизации и в sync_all_addresses.
 
         Args:
-            tx_data: Данные транзакции
+            block_txs: Данные транзакций блока
             block_height: Высота блока
         """
+        addresses = set()
+        for tx_data in block_txs:
+            for vout in tx_data.get("vout", []):
+                script_pubkey = vout.get("scriptPubKey", {})
+                addresses.update(script_pubkey.get("addresses", []))
+
+                # Если нет поля addresses, пытаемся получить из address
+                address = script_pubkey.get("address")
+                if address:
+                    addresses.add(address)
+
         try:
-            # Извлекаем адреса из выходов транзакции
-            if "vout" in tx_data:
-                for vout in tx_data["vout"]:
-                    script_pubkey = vout.get("scriptPubKey", {})
-                    addresses = script_pubkey.get("addresses", [])
-
-                    # Если нет поля addresses, пытаемся получить из address
-                    if not addresses:
-                        address = script_pubkey.get("address")
-                        if address:
-                            addresses = [address]
-
-                    # Синхронизируем каждый адрес
-                    for address in addresses:
-                        try:
-                            self.address_service.sync_address_from_outputs(
-                                address, block_height
-                            )
-                            self._sync_stats["addresses_synced"] += 1
-                        except Exception as addr_error:
-                            logger.debug(
-                                f"Ошибка синхронизации адреса {address}: {addr_error}"
-                            )
+            updated = self.address_service.update_seen_blocks(
+                list(addresses), block_height
+            )
+            self._sync_stats["addresses_synced"] += updated
         except Exception as e:
-            logger.debug(f"Ошибка синхронизации адресов из транзакции: {e}")
+            logger.debug(f"Ошибка синхронизации адресов блока {block_height}: {e}")
 
     async def sync_all_addresses(self) -> Dict[str, Any]:
         """
@@ -2,19 +2,95 @@
 Сервис для работы с транзакциями Bitcoin
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
-
-from sqlalchemy import desc
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    bindparam,
+    case,
+    desc,
+    distinct,
+    func,
+    select,
+    text,
+    tuple_,
+)
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-from app.database import get_db
+from app.cache import LRUCache
+from app.config import settings
+from app.database import dialect_insert, get_db
+from app.models.address import Address
 from app.models.transaction import Transaction, TransactionInput, TransactionOutput
 from app.services.bitcoin_rpc import BitcoinRPCError, bitcoin_rpc
 
 logger = logging.getLogger(__name__)
 
+# Количество сатоши в одном BTC
+SATOSHI_PER_BTC = Decimal(100000000)
+
+# Минимальная длина префикса txid для поиска: более короткие префиксы
+# совпадают со слишком большой частью таблицы
+MIN_TXID_PREFIX_LENGTH = 4
+
+# Подтвержденные транзакции неизменны (кроме реорганизаций), поэтому объекты
+# с загруженными входами и выходами переиспользуются между сессиями
+_transaction_cache = LRUCache(maxsize=settings.TRANSACTION_CACHE_SIZE)
+
+
+def to_satoshi(value: Any) -> int:
+    """
+    Перевод суммы в BTC в сатоши без ошибок округления float
+
+    Args:
+        value: Сумма в BTC (AuthServiceProxy отдает Decimal)
+    """
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int((value * SATOSHI_PER_BTC).to_integral_value())
+
+
+# Запросы горячих путей строятся один раз: SQLAlchemy кэширует их компиляцию,
+# а значения подставляются через bindparam при каждом вызове
+_STMT_TX_BY_TXID = select(Transaction).where(Transaction.txid == bindparam("txid"))
+
+_STMT_LATEST_TXS = (
+    select(Transaction)
+    .where(Transaction.block_height.isnot(None))
+    .order_by(desc(Transaction.block_height).nulls_last(), desc(Transaction.id))
+    .offset(bindparam("offset"))
+    .limit(bindparam("limit"))
+)
+_STMT_LATEST_TXS_COUNT = (
+    select(func.count())
+    .select_from(Transaction)
+    .where(Transaction.block_height.isnot(None))
+)
+
+_STMT_UNCONFIRMED_TXS = (
+    select(Transaction)
+    .where(Transaction.block_hash.is_(None))
+    .order_by(desc(Transaction.id))
+    .offset(bindparam("offset"))
+    .limit(bindparam("limit"))
+)
+_STMT_UNCONFIRMED_TXS_COUNT = (
+    select(func.count())
+    .select_from(Transaction)
+    .where(Transaction.block_hash.is_(None))
+)
+
+_STMT_TX_COUNT = select(func.count()).select_from(Transaction)
+
+# Оценка числа строк из статистики планировщика PostgreSQL: O(1) вместо
+# полного прохода COUNT(*); обновляется VACUUM/ANALYZE (в т.ч. autovacuum)
+_STMT_TX_COUNT_ESTIMATE = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = 'transactions'::regclass"
+)
+
 
 class TransactionServiceError(Exception):
     """Исключение для ошибок сервиса транзакций"""
@@ -36,10 +112,7 @@ class TransactionService:
             txid: ID транзакции
         """
         try:
-            transaction = (
-                self.db.query(Transaction).filter(Transaction.txid == txid).first()
-            )
-            return transaction
+            return self.db.scalars(_STMT_TX_BY_TXID, {"txid": txid}).first()
         except Exception as e:
             logger.error(f"Ошибка получения транзакции по txid {txid}: {e}")
             raise TransactionServiceError(f"Не удалось получить транзакцию: {e}")
@@ -53,13 +126,10 @@ class TransactionService:
             offset: Смещение для пагинации
         """
         try:
-            query = (
-                self.db.query(Transaction)
-                .filter(Transaction.block_height.isnot(None))
-                .order_by(desc(Transaction.block_height), desc(Transaction.id))
-            )
-            total = query.count()
-            transactions = query.offset(offset).limit(limit).all()
+            total = self.db.scalar(_STMT_LATEST_TXS_COUNT)
+            transactions = self.db.scalars(
+                _STMT_LATEST_TXS, {"offset": offset, "limit": limit}
+            ).all()
             return transactions, total
         except Exception as e:
             logger.error(f"Ошибка получения последних транзакций: {e}")
@@ -76,14 +146,11 @@ class TransactionService:
             limit: Количество транзакций для возврата
         """
         try:
-            query = (
-                self.db.query(Transaction)
-                .filter(Transaction.block_hash.is_(None))
-                .order_by(desc(Transaction.id))
-            )
-            total = query.count()
+            total = self.db.scalar(_STMT_UNCONFIRMED_TXS_COUNT)
             offset = (page - 1) * limit
-            transactions = query.offset(offset).limit(limit).all()
+            transactions = self.db.scalars(
+                _STMT_UNCONFIRMED_TXS, {"offset": offset, "limit": limit}
+            ).all()
             return transactions, total
         except Exception as e:
             logger.error(f"Ошибка получения неподтвержденных транзакций: {e}")
@@ -119,10 +186,8 @@ class TransactionService:
         try:
             query = (
                 self.db.query(Transaction)
-                .join(TransactionOutput)
-                .filter(TransactionOutput.address == address)
+                .filter(self._has_output_to(address))
                 .order_by(desc(Transaction.block_height), desc(Transaction.id))
-                .distinct()
             )
             total = query.count()
             offset = (page - 1) * limit
@@ -142,9 +207,11 @@ class TransactionService:
             address: Bitcoin адрес
         """
         try:
-            # Получаем все выходы для адреса
+            # Получаем все выходы для адреса вместе с их транзакциями
+            # одним дополнительным SELECT ... WHERE id IN (...)
             outputs = (
                 self.db.query(TransactionOutput)
+                .options(selectinload(TransactionOutput.transaction))
                 .filter(TransactionOutput.address == address)
                 .all()
             )
@@ -177,56 +244,152 @@ class TransactionService:
             raise TransactionServiceError(f"Не удалось получить UTXO: {e}")
 
     async def get_total_transactions(self) -> int:
-        """Получение общего количества транзакций в БД"""
-        try:
-            return self.db.query(Transaction).count()
-        except Exception as e:
-            logger.error(f"Ошибка получения количества транзакций: {e}")
-            return 0
+        """Получение общего количества транзакций в БД (приблизительно)"""
+        return self.get_transaction_count()
 
     def get_transactions_paginated(
-        self, page: int = 1, per_page: int = 50, confirmed_only: bool = True
+        self,
+        cursor: Optional[Tuple[Optional[int], int]] = None,
+        per_page: int = 50,
+        confirmed_only: bool = True,
     ) -> Dict[str, Any]:
         """
-        Получение транзакций с пагинацией
+        Получение транзакций с keyset-пагинацией
 
         Args:
-            page: Номер страницы (начиная с 1)
+            cursor: (block_height, id) последней транзакции предыдущей страницы,
+                None для первой страницы
             per_page: Количество элементов на странице
             confirmed_only: Только подтвержденные транзакции
         """
         try:
             # Валидация параметров
-            if page < 1:
-                page = 1
             if per_page < 1 or per_page > 100:
                 per_page = 50
 
-            # Запрос с пагинацией
-            query = self.db.query(Transaction)
-
-            if confirmed_only:
-                query = query.filter(Transaction.block_height.isnot(None))
-
-            query = query.order_by(desc(Transaction.block_height), desc(Transaction.id))
-
-            total = query.count()
-            offset = (page - 1) * per_page
-            transactions = query.offset(offset).limit(per_page).all()
+            # Лишняя строка вместо COUNT(*) показывает, есть ли следующая страница
+            rows = self._paginate_by_cursor(
+                self.db.query(Transaction),
+                cursor,
+                per_page + 1,
+                include_unconfirmed=not confirmed_only,
+            )
 
-            return {
-                "transactions": transactions,
-                "total": total,
-                "page": page,
-                "per_page": per_page,
-                "total_pages": (total + per_page - 1) // per_page,
-                "has_next": page * per_page < total,
-                "has_prev": page > 1,
-            }
+            return self._cursor_page(rows, per_page)
         except Exception as e:
             logger.error(f"Ошибка пагинации транзакций: {e}")
             raise TransactionServiceError(f"Не удалось получить транзакции: {e}")
 
+    @staticmethod
+    def _has_output_to(address: str):
+        """
+        Условие EXISTS: у транзакции есть выход на указанный адрес
+
+        Args:
+            address: Bitcoin адрес
+        """
+        return (
+            select(TransactionOutput.id)
+            .where(
+                TransactionOutput.transaction_id == Transaction.id,
+                TransactionOutput.address == address,
+            )
+            .exists()
+        )
+
+    @staticmethod
+    def _output_is_spent(*criteria):
+        """
+        Условие EXISTS: на выход транзакции ссылается хотя бы один вход
+
+        Общее для инкрементального учета балансов и полного пересчета.
+
+        Args:
+            *criteria: Дополнительные условия на вход
+        """
+        return (
+            select(TransactionInput.id)
+            .where(
+                TransactionInput.prev_txid == Transaction.txid,
+                TransactionInput.vout == TransactionOutput.n,
+                *criteria,
+            )
+            .exists()
+        )
+
+    def _paginate_by_cursor(
+        self,
+        query,
+        cursor: Optional[Tuple[Optional[int], int]],
+        limit: int,
+        include_unconfirmed: bool = True,
+    ) -> List[Transaction]:
+        """
+        Выборка страницы по ключу (block_height, id) в порядке убывания
+
+        Неподтвержденные транзакции (block_height IS NULL) идут после
+        подтвержденных и выбираются отдельным запросом, только если страница
+        подтвержденных оказалась неполной. Так условие по курсору остается
+        простым диапазоном по индексу, и стоимость не растет с номером
+        страницы, в отличие от OFFSET.
+
+        Args:
+            query: Запрос по Transaction с уже примененными фильтрами
+            cursor: (block_height, id) последней строки предыдущей страницы
+            limit: Количество строк
+            include_unconfirmed: Дополнять выборку неподтвержденными
+        """
+        rows: List[Transaction] = []
+
+        # Подтвержденные транзакции; курсор с высотой None означает, что
+        # они уже пройдены
+        if cursor is None or cursor[0] is not None:
+            confirmed = query.filter(Transaction.block_height.isnot(None))
+            if cursor is not None:
+                confirmed = confirmed.filter(
+                    tuple_(Transaction.block_height, Transaction.id)
+                    < (cursor[0], cursor[1])
+                )
+            rows = (
+                confirmed.order_by(
+                    desc(Transaction.block_height).nulls_last(), desc(Transaction.id)
+                )
+                .limit(limit)
+                .all()
+            )
+
+        # Хвост из неподтвержденных транзакций
+        if include_unconfirmed and len(rows) < limit:
+            unconfirmed = query.filter(Transaction.block_height.is_(None))
+            if cursor is not None and cursor[0] is None:
+                unconfirmed = unconfirmed.filter(Transaction.id < cursor[1])
+            rows += (
+                unconfirmed.order_by(desc(Transaction.id))
+                .limit(limit - len(rows))
+                .all()
+            )
+
+        return rows
+
+    @staticmethod
+    def _cursor_page(rows: List[Transaction], per_page: int) -> Dict[str, Any]:
+        """
+        Формирование ответа keyset-пагинации
+
+        Args:
+            rows: До per_page + 1 транзакций, выбранных по курсору
+            per_page: Запрошенный размер страницы
+        """
+        has_next = len(rows) > per_page
+        transactions = rows[:per_page]
+        last = transactions[-1] if has_next else None
+        return {
+            "transactions": transactions,
+            "per_page": per_page,
+            "next_cursor": (last.block_height, last.id) if last else None,
+            "has_next": has_next,
+        }
+
     def fetch_transaction_from_rpc(self, txid: str) -> Dict[str, Any]:
         """
         Получение транзакции из Bitcoin Core через RPC
@@ -235,8 +398,11 @@ class TransactionService:
             txid: ID транзакции
         """
         try:
-            # Получаем транзакцию через RPC
+            # Получаем транзакцию через RPC; высоту блока запрашиваем здесь
+            # же, чтобы при сохранении не было RPC вызовов
             tx_data = bitcoin_rpc.get_raw_transaction(txid, verbose=True)
+            if tx_data.get("blockhash") and not tx_data.get("blockheight"):
+                tx_data["blockheight"] = self._resolve_block_height(tx_data)
             return tx_data
 
         except BitcoinRPCError as e:
@@ -255,104 +421,323 @@ class TransactionService:
         Args:
             tx_data: Данные транзакции из RPC
         """
+        return self.save_transactions_bulk([tx_data])[0]
+
+    def save_transactions_bulk(
+        self, tx_data_list: List[Dict[str, Any]]
+    ) -> List[Transaction]:
+        """
+        Сохранение набора транзакций (например, всего блока) одним коммитом
+
+        Транзакции, входы и выходы вставляются по одному executemany INSERT
+        на таблицу; уже существующие txid пропускаются.
+
+        Args:
+            tx_data_list: Данные транзакций из RPC
+
+        Returns:
+            Сохраненные или уже существовавшие транзакции в порядке txid
+        """
+        # Повторы txid внутри набора сохраняем один раз
+        unique_txs = list({tx["txid"]: tx for tx in reversed(tx_data_list)}.values())
+        unique_txs.reverse()
+        if not unique_txs:
+            return []
+
         try:
-            # Проверяем, существует ли транзакция
-            existing_tx = self.get_transaction_by_txid(tx_data["txid"])
-            if existing_tx:
-                logger.info(f"Транзакция {tx_data['txid']} уже существует в БД")
-                return existing_tx
-
-            # Получаем block_hash и block_height
-            block_hash = tx_data.get("blockhash")
-            block_height = tx_data.get("blockheight")
-
-            # Если есть blockhash, но нет blockheight - получаем его через RPC
-            if block_hash and not block_height:
-                try:
-                    block_header = bitcoin_rpc.get_block_header(block_hash)
-                    block_height = block_header["height"]
-                    logger.debug(
-                        f"Получена высота блока {block_height} для транзакции {tx_data['txid']}"
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"Не удалось получить высоту блока для {block_hash}: {e}"
-                    )
+            # Вставляем транзакции; существующие txid пропускаются без
+            # отдельного SELECT для проверки дубликатов
+            inserted = {
+                tx.txid: tx
+                for tx in self.db.scalars(
+                    dialect_insert(self.db, Transaction)
+                    .on_conflict_do_nothing(index_elements=[Transaction.txid])
+                    .returning(Transaction),
+                    [self._transaction_row(tx_data) for tx_data in unique_txs],
+                )
+            }
+            new_txs = [tx for tx in unique_txs if tx["txid"] in inserted]
+
+            # Входы и выходы всех новых транзакций — по одному executemany
+            # INSERT на уровне таблицы, минуя ORM-маппер и unit of work
+            input_rows = [
+                row
+                for tx_data in new_txs
+                for row in self._input_rows(tx_data, inserted[tx_data["txid"]].id)
+            ]
+            if input_rows:
+                self.db.execute(TransactionInput.__table__.insert(), input_rows)
+
+            output_rows = [
+                row
+                for tx_data in new_txs
+                for row in self._output_rows(tx_data, inserted[tx_data["txid"]].id)
+            ]
+            if output_rows:
+                self.db.execute(TransactionOutput.__table__.insert(), output_rows)
+
+            # Обновляем сводные балансы адресов
+            if new_txs:
+                self._update_address_balances(
+                    [inserted[tx_data["txid"]] for tx_data in new_txs],
+                    input_rows,
+                    output_rows,
+                )
 
-            # Создаем новую транзакцию
-            transaction = Transaction(
-                txid=tx_data["txid"],
-                block_hash=block_hash,
-                block_height=block_height,
-                version=tx_data.get("version"),
-                locktime=tx_data.get("locktime"),
-                size=tx_data.get("size"),
-                vsize=tx_data.get("vsize"),
-                weight=tx_data.get("weight"),
-                fee=self._calculate_fee(tx_data),
-            )
+            self.db.commit()
 
-            self.db.add(transaction)
-            self.db.flush()  # Получаем ID транзакции
-
-            # Сохраняем входы транзакции
-            if "vin" in tx_data:
-                for vin in tx_data["vin"]:
-                    tx_input = TransactionInput(
-                        transaction_id=transaction.id,
-                        vout=vin.get("vout"),
-                        prev_txid=vin.get("txid"),
-                        script_sig=vin.get("scriptSig", {}).get("hex"),
-                        sequence=vin.get("sequence"),
-                    )
-                    self.db.add(tx_input)
-
-            # Сохраняем выходы транзакции
-            if "vout" in tx_data:
-                for vout in tx_data["vout"]:
-                    # Извлекаем адрес из scriptPubKey
-                    script_pubkey = vout.get("scriptPubKey", {})
-                    addresses = script_pubkey.get("addresses", [])
-                    address = addresses[0] if addresses else None
-
-                    # Если нет поля addresses, пытаемся получить из address
-                    if not address:
-                        address = script_pubkey.get("address")
-
-                    tx_output = TransactionOutput(
-                        transaction_id=transaction.id,
-                        n=vout.get("n"),
-                        value=int(
-                            vout.get("value", 0) * 100000000
-                        ),  # Конвертируем BTC в сатоши
-                        script_pubkey=script_pubkey.get("hex"),
-                        address=address,
+            # Уже существовавшие транзакции читаем одним запросом
+            existing_txids = [
+                tx["txid"] for tx in unique_txs if tx["txid"] not in inserted
+            ]
+            existing = {}
+            if existing_txids:
+                logger.info(
+                    f"Пропущено {len(existing_txids)} уже существующих транзакций"
+                )
+                existing = {
+                    tx.txid: tx
+                    for tx in self.db.scalars(
+                        select(Transaction).where(Transaction.txid.in_(existing_txids))
                     )
-                    self.db.add(tx_output)
+                }
 
-            self.db.commit()
-            self.db.refresh(transaction)
+            if new_txs:
+                logger.info(f"Сохранено {len(new_txs)} транзакций в БД")
 
-            logger.info(f"Транзакция {transaction.txid} успешно сохранена в БД")
-            return transaction
+            saved = {**existing, **inserted}
+            return [saved[tx_data["txid"]] for tx_data in tx_data_list]
 
         except IntegrityError as e:
-            # Обрабатываем случай, когда транзакция уже существует (race condition)
             self.db.rollback()
-            logger.warning(
-                f"Транзакция {tx_data['txid']} уже существует в БД (race condition)"
-            )
-            # Пытаемся получить существующую транзакцию
-            existing_tx = self.get_transaction_by_txid(tx_data["txid"])
-            if existing_tx:
-                return existing_tx
-            # Если не нашли, пробрасываем ошибку
-            logger.error(f"Ошибка целостности БД для транзакции {tx_data['txid']}: {e}")
+            logger.error(f"Ошибка целостности БД при сохранении транзакций: {e}")
             raise TransactionServiceError(f"Ошибка целостности БД: {e}")
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Ошибка сохранения транзакции в БД: {e}")
-            raise TransactionServiceError(f"Не удалось сохранить транзакцию: {e}")
+            logger.error(f"Ошибка сохранения транзакций в БД: {e}")
+            raise TransactionServiceError(f"Не удалось сохранить транзакции: {e}")
+
+    def _resolve_block_height(self, tx_data: Dict[str, Any]) -> Optional[int]:
+        """
+        Высота блока транзакции
+
+        getrawtransaction возвращает blockhash без высоты, тогда она
+        запрашивается через RPC по заголовку блока.
+
+        Args:
+            tx_data: Данные транзакции из RPC
+        """
+        block_hash = tx_data.get("blockhash")
+        block_height = tx_data.get("blockheight")
+
+        # Если есть blockhash, но нет blockheight - получаем его через RPC
+        if block_hash and not block_height:
+            try:
+                block_header = bitcoin_rpc.get_block_header(block_hash)
+                block_height = block_header["height"]
+                logger.debug(
+                    f"Получена высота блока {block_height} "
+                    f"для транзакции {tx_data['txid']}"
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Не удалось получить высоту блока для {block_hash}: {e}"
+                )
+
+        return block_height
+
+    def _transaction_row(self, tx_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Строка таблицы transactions из данных RPC
+
+        Args:
+            tx_data: Данные транзакции из RPC
+        """
+        return {
+            "txid": tx_data["txid"],
+            "block_hash": tx_data.get("blockhash"),
+            "block_height": self._resolve_block_height(tx_data),
+            "version": tx_data.get("version"),
+            "locktime": tx_data.get("locktime"),
+            "size": tx_data.get("size"),
+            "vsize": tx_data.get("vsize"),
+            "weight": tx_data.get("weight"),
+            "fee": self._calculate_fee(tx_data),
+        }
+
+    @staticmethod
+    def _input_rows(
+        tx_data: Dict[str, Any], transaction_id: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Строки таблицы transaction_inputs из данных RPC
+
+        Args:
+            tx_data: Данные транзакции из RPC
+            transaction_id: ID сохраненной транзакции
+        """
+        return [
+            {
+                "transaction_id": transaction_id,
+                "vout": vin.get("vout"),
+                "prev_txid": vin.get("txid"),
+                "script_sig": vin.get("scriptSig", {}).get("hex"),
+                "sequence": vin.get("sequence"),
+            }
+            for vin in tx_data.get("vin", [])
+        ]
+
+    @staticmethod
+    def _output_rows(
+        tx_data: Dict[str, Any], transaction_id: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Строки таблицы transaction_outputs из данных RPC
+
+        Args:
+            tx_data: Данные транзакции из RPC
+            transaction_id: ID сохраненной транзакции
+        """
+        output_rows = []
+        for vout in tx_data.get("vout", []):
+            # Извлекаем адрес из scriptPubKey
+            script_pubkey = vout.get("scriptPubKey", {})
+            addresses = script_pubkey.get("addresses", [])
+            address = addresses[0] if addresses else None
+
+            # Если нет поля addresses, пытаемся получить из address
+            if not address:
+                address = script_pubkey.get("address")
+
+            output_rows.append(
+                {
+                    "transaction_id": transaction_id,
+                    "n": vout.get("n"),
+                    "value": to_satoshi(vout.get("value", 0)),
+                    "script_pubkey": script_pubkey.get("hex"),
+                    "address": address,
+                }
+            )
+        return output_rows
+
+    def _update_address_balances(
+        self,
+        transactions: List[Transaction],
+        input_rows: List[Dict[str, Any]],
+        output_rows: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Инкрементальное обновление сводных балансов в таблице addresses
+
+        Args:
+            transactions: Только что вставленные транзакции
+            input_rows: Строки входов этих транзакций
+            output_rows: Строки выходов этих транзакций
+        """
+        new_ids = [tx.id for tx in transactions]
+        heights = {tx.id: tx.block_height for tx in transactions}
+        received: Dict[str, int] = {}
+        spent: Dict[str, int] = {}
+        tx_ids: Dict[str, set] = {}
+
+        for row in output_rows:
+            address = row["address"]
+            if not address:
+                continue
+            received[address] = received.get(address, 0) + row["value"]
+            tx_ids.setdefault(address, set()).add(row["transaction_id"])
+
+        # Новые выходы, на которые уже ссылается какой-либо вход
+        # (в том числе сохраненный раньше самой транзакции)
+        is_spent = self._output_is_spent()
+        spent_outputs = list(
+            self.db.execute(
+                select(TransactionOutput.address, TransactionOutput.value)
+                .join(Transaction, TransactionOutput.transaction_id == Transaction.id)
+                .where(
+                    TransactionOutput.transaction_id.in_(new_ids),
+                    TransactionOutput.address.isnot(None),
+                    is_spent,
+                )
+            )
+        )
+
+        # Старые выходы, которые впервые тратят новые входы: если выход
+        # уже тратил другой вход, он был учтен раньше
+        prevouts = [
+            (row["prev_txid"], row["vout"]) for row in input_rows if row["prev_txid"]
+        ]
+        if prevouts:
+            spent_earlier = self._output_is_spent(
+                TransactionInput.transaction_id.not_in(new_ids)
+            )
+            spent_outputs.extend(
+                self.db.execute(
+                    select(TransactionOutput.address, TransactionOutput.value)
+                    .join(
+                        Transaction, TransactionOutput.transaction_id == Transaction.id
+                    )
+                    .where(
+                        tuple_(Transaction.txid, TransactionOutput.n).in_(prevouts),
+                        TransactionOutput.transaction_id.not_in(new_ids),
+                        TransactionOutput.address.isnot(None),
+                        ~spent_earlier,
+                    )
+                )
+            )
+
+        for address, value in spent_outputs:
+            spent[address] = spent.get(address, 0) + (value or 0)
+
+        if not received and not spent:
+            return
+
+        rows = []
+        for address in received.keys() | spent.keys():
+            seen_in = tx_ids.get(address, set())
+            seen_heights = [
+                heights[tx_id] for tx_id in seen_in if heights[tx_id] is not None
+            ]
+            rows.append(
+                {
+                    "address": address,
+                    "total_received": received.get(address, 0),
+                    "total_spent": spent.get(address, 0),
+                    "balance": received.get(address, 0) - spent.get(address, 0),
+                    "tx_count": len(seen_in),
+                    "first_seen_block": min(seen_heights, default=None),
+                    "last_seen_block": max(seen_heights, default=None),
+                }
+            )
+
+        # Одна executemany вставка с ON CONFLICT на все адреса набора
+        addresses = Address.__table__
+        stmt = dialect_insert(self.db, addresses)
+        set_ = {
+            column: func.coalesce(addresses.c[column], 0) + stmt.excluded[column]
+            for column in ("total_received", "total_spent", "balance", "tx_count")
+        }
+        # Границы появления адреса только расширяются: GREATEST/LEAST нет
+        # в SQLite, поэтому min/max через CASE (NULL новой строки не
+        # затирает сохраненное значение)
+        first_seen = addresses.c.first_seen_block
+        last_seen = addresses.c.last_seen_block
+        new_first = stmt.excluded.first_seen_block
+        new_last = stmt.excluded.last_seen_block
+        set_["first_seen_block"] = case(
+            (first_seen.is_(None), new_first),
+            (new_first < first_seen, new_first),
+            else_=first_seen,
+        )
+        set_["last_seen_block"] = case(
+            (last_seen.is_(None), new_last),
+            (new_last > last_seen, new_last),
+            else_=last_seen,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[addresses.c.address], set_=set_
+        )
+        self.db.execute(stmt, rows)
 
     def _calculate_fee(self, tx_data: Dict[str, Any]) -> Optional[int]:
         """
@@ -364,17 +749,10 @@ class TransactionService:
         try:
             # Если комиссия уже указана в данных
             if "fee" in tx_data:
-                return int(abs(tx_data["fee"]) * 100000000)  # Конвертируем BTC в сатоши
-
-            # Вычисляем комиссию как разность входов и выходов
-            total_output = 0
-
-            # Суммируем выходы
-            for vout in tx_data.get("vout", []):
-                total_output += int(vout.get("value", 0) * 100000000)
+                return to_satoshi(abs(tx_data["fee"]))
 
-            # Для вычисления входов нужно получить предыдущие транзакции
-            # Это может быть дорогой операцией, поэтому пропускаем для coinbase
+            # Комиссия — разность входов и выходов, но суммы входов требуют
+            # предыдущих транзакций; сумму выходов без них не считаем
             if tx_data.get("vin", [{}])[0].get("coinbase"):
                 return 0  # Coinbase транзакция не имеет комиссии
 
@@ -384,7 +762,7 @@ class TransactionService:
             logger.warning(f"Не удалось вычислить комиссию для транзакции: {e}")
             return None
 
-    def get_or_fetch_transaction(self, txid: str) -> Transaction:
+    async def get_or_fetch_transaction(self, txid: str) -> Transaction:
         """
         Получение транзакции из БД или через RPC
 
@@ -392,60 +770,71 @@ class TransactionService:
             txid: ID транзакции
         """
         try:
+            cached_tx = _transaction_cache.get(txid)
+            if cached_tx is not None:
+                # Привязываем копию к текущей сессии без запроса к БД
+                return self.db.merge(cached_tx, load=False)
+
             # Сначала пытаемся найти в БД
             transaction = self.get_transaction_by_txid(txid)
-            if transaction:
-                return transaction
+            if not transaction:
+                # Если не найдена в БД, получаем через RPC и сохраняем
+                logger.info(f"Транзакция {txid} не найдена в БД, получаем через RPC")
+                tx_data = await asyncio.to_thread(self.fetch_transaction_from_rpc, txid)
+                transaction = self.save_transaction_to_db(tx_data)
+
+            # Транзакции из мемпула не кэшируем: они еще могут измениться
+            if transaction.block_height is not None:
+                # Загружаем связи заранее, чтобы кэшированный объект
+                # не требовал ленивой загрузки в другой сессии
+                transaction = (
+                    self.db.query(Transaction)
+                    .options(
+                        selectinload(Transaction.inputs),
+                        selectinload(Transaction.outputs),
+                    )
+                    .filter(Transaction.id == transaction.id)
+                    .one()
+                )
+                _transaction_cache.set(txid, transaction)
 
-            # Если не найдена в БД, получаем через RPC и сохраняем
-            logger.info(f"Транзакция {txid} не найдена в БД, получаем через RPC")
-            tx_data = self.fetch_transaction_from_rpc(txid)
-            return self.save_transaction_to_db(tx_data)
+            return transaction
 
         except Exception as e:
             logger.error(f"Ошибка получения транзакции {txid}: {e}")
             raise TransactionServiceError(f"Не удалось получить транзакцию: {e}")
 
+    def clear_transaction_cache(self) -> None:
+        """Очистка кэша транзакций (например, после реорганизации)"""
+        _transaction_cache.clear()
+
     def get_transactions_by_address(
-        self, address: str, page: int = 1, per_page: int = 50
+        self,
+        address: str,
+        cursor: Optional[Tuple[Optional[int], int]] = None,
+        per_page: int = 50,
     ) -> Dict[str, Any]:
         """
-        Получение транзакций по адресу
+        Получение транзакций по адресу с keyset-пагинацией
 
         Args:
             address: Bitcoin адрес
-            page: Номер страницы
+            cursor: (block_height, id) последней транзакции предыдущей страницы
             per_page: Количество транзакций на странице
         """
         try:
             # Валидация параметров
-            if page < 1:
-                page = 1
             if per_page < 1 or per_page > 100:
                 per_page = 50
 
-            # Получаем транзакции через выходы
-            query = (
-                self.db.query(Transaction)
-                .join(TransactionOutput)
-                .filter(TransactionOutput.address == address)
-                .order_by(desc(Transaction.block_height), desc(Transaction.id))
-                .distinct()
-            )
+            # Транзакции, у которых есть выход на адрес: EXISTS вместо
+            # JOIN + DISTINCT не размножает строки и не требует сортировки
+            query = self.db.query(Transaction).filter(self._has_output_to(address))
 
-            total = query.count()
-            offset = (page - 1) * per_page
-            transactions = query.offset(offset).limit(per_page).all()
+            # Лишняя строка вместо COUNT(*) показывает, есть ли следующая страница
+            rows = self._paginate_by_cursor(query, cursor, per_page + 1)
 
-            return {
-                "transactions": transactions,
-                "total": total,
-                "page": page,
-                "per_page": per_page,
-                "total_pages": (total + per_page - 1) // per_page,
-                "has_next": page * per_page < total,
-                "has_prev": page > 1,
-            }
+            return self._cursor_page(rows, per_page)
 
         except Exception as e:
             logger.error(f"Ошибка получения транзакций для адреса {address}: {e}")
@@ -461,9 +850,19 @@ class TransactionService:
             query: Поисковый запрос (txid или его часть)
         """
         try:
+            # txid хранится в нижнем регистре, поэтому не-hex запрос
+            # заведомо ничего не найдет
+            prefix = query.strip().lower()
+            if not (
+                MIN_TXID_PREFIX_LENGTH <= len(prefix) <= 64
+                and all(c in "0123456789abcdef" for c in prefix)
+            ):
+                return []
+
+            # Префиксный LIKE использует индекс ix_transactions_txid_prefix
             transactions = (
                 self.db.query(Transaction)
-                .filter(Transaction.txid.like(f"{query}%"))
+                .filter(Transaction.txid.like(f"{prefix}%"))
                 .limit(10)
                 .all()
             )
@@ -473,7 +872,7 @@ class TransactionService:
             logger.error(f"Ошибка поиска транзакций по запросу '{query}': {e}")
             raise TransactionServiceError(f"Ошибка поиска: {e}")
 
-    def get_mempool_transactions(self) -> List[Dict[str, Any]]:
+    async def get_mempool_transactions(self) -> List[Dict[str, Any]]:
         """
         Получение транзакций из мемпула через RPC
 
@@ -481,19 +880,21 @@ class TransactionService:
             Список транзакций в мемпуле
         """
         try:
-            mempool_txids = bitcoin_rpc.get_raw_mempool(verbose=False)
-            transactions = []
+            mempool_txids = await asyncio.to_thread(bitcoin_rpc.get_raw_mempool, False)
 
-            # Ограничиваем количество для производительности
-            for txid in mempool_txids[:50]:
-                try:
-                    tx_data = bitcoin_rpc.get_raw_transaction(txid, verbose=True)
-                    transactions.append(tx_data)
-                except Exception as e:
-                    logger.warning(
-                        f"Не удалось получить транзакцию {txid} из мемпула: {e}"
-                    )
+            # Ограничиваем количество для производительности и запрашиваем
+            # все транзакции одним пакетным RPC вызовом
+            txids = mempool_txids[:50]
+            results = await bitcoin_rpc.batch_call_async(
+                [("getrawtransaction", [txid, True]) for txid in txids]
+            )
+
+            transactions = []
+            for txid, tx_data in zip(txids, results):
+                if tx_data is None:
+                    logger.warning(f"Не удалось получить транзакцию {txid} из мемпула")
                     continue
+                transactions.append(tx_data)
 
             return transactions
 
@@ -501,50 +902,78 @@ class TransactionService:
             logger.error(f"Ошибка получения мемпула: {e}")
             raise TransactionServiceError(f"Не удалось получить мемпул: {e}")
 
-    def get_transaction_count(self) -> int:
-        """Получение общего количества транзакций в БД"""
+    def get_transaction_count(self, approximate: bool = True) -> int:
+        """
+        Получение общего количества транзакций в БД
+
+        Args:
+            approximate: Разрешить оценку по pg_class.reltuples на PostgreSQL
+                вместо точного COUNT(*)
+        """
         try:
-            return self.db.query(Transaction).count()
+            if approximate and self.db.get_bind().dialect.name == "postgresql":
+                estimate = self.db.scalar(_STMT_TX_COUNT_ESTIMATE)
+                # -1 (или 0 до PostgreSQL 14) — таблица еще не анализировалась
+                if estimate and estimate > 0:
+                    return estimate
+
+            return self.db.scalar(_STMT_TX_COUNT)
         except Exception as e:
             logger.error(f"Ошибка получения количества транзакций: {e}")
             return 0
 
     def get_address_balance(self, address: str) -> Dict[str, Any]:
         """
-        Вычисление баланса адреса на основе UTXO
+        Получение баланса адреса из сводной таблицы addresses
 
         Args:
             address: Bitcoin адрес
         """
         try:
-            # Получаем все выходы для адреса
-            outputs = (
-                self.db.query(TransactionOutput)
-                .filter(TransactionOutput.address == address)
-                .all()
-            )
+            summary = self.db.query(Address).filter(Address.address == address).first()
+            if summary is None or summary.total_received is None:
+                # Адрес еще не попал в сводную таблицу — считаем по выходам
+                return self._calculate_address_balance(address)
 
-            # Получаем все входы, которые потратили эти выходы
-            spent_outputs = set()
-            for output in outputs:
-                spent_input = (
-                    self.db.query(TransactionInput)
-                    .filter(
-                        TransactionInput.prev_txid == output.transaction.txid,
-                        TransactionInput.vout == output.n,
-                    )
-                    .first()
+            return {
+                "address": address,
+                "balance": summary.balance,
+                "total_received": summary.total_received,
+                "total_spent": summary.total_spent,
+                "tx_count": summary.tx_count,
+            }
+
+        except Exception as e:
+            logger.error(f"Ошибка вычисления баланса для адреса {address}: {e}")
+            raise TransactionServiceError(f"Не удалось вычислить баланс: {e}")
+
+    def _calculate_address_balance(self, address: str) -> Dict[str, Any]:
+        """
+        Вычисление баланса адреса по выходам и входам транзакций
+
+        Args:
+            address: Bitcoin адрес
+        """
+        try:
+            # Выход потрачен, если на него ссылается хотя бы один вход
+            is_spent = self._output_is_spent()
+
+            # Суммы и количество транзакций считаем одним запросом в БД
+            total_received, total_spent, tx_count = self.db.execute(
+                select(
+                    func.coalesce(func.sum(TransactionOutput.value), 0),
+                    func.coalesce(
+                        func.sum(case((is_spent, TransactionOutput.value), else_=0)),
+                        0,
+                    ),
+                    func.count(distinct(Transaction.id)),
                 )
-                if spent_input:
-                    spent_outputs.add((output.transaction.txid, output.n))
+                .select_from(TransactionOutput)
+                .join(Transaction, TransactionOutput.transaction_id == Transaction.id)
+                .where(TransactionOutput.address == address)
+            ).one()
 
             # Вычисляем баланс
-            total_received = sum(output.value for output in outputs)
-            total_spent = sum(
-                output.value
-                for output in outputs
-                if (output.transaction.txid, output.n) in spent_outputs
-            )
             balance = total_received - total_spent
 
             return {
@@ -552,7 +981,7 @@ class TransactionService:
                 "balance": balance,
                 "total_received": total_received,
                 "total_spent": total_spent,
-                "tx_count": len(set(output.transaction.txid for output in outputs)),
+                "tx_count": tx_count,
             }
 
         except Exception as e:
@@ -0,0 +1,97 @@
+"""Add total_received and total_spent to addresses
+
+Revision ID: 7c41e2a9b5d3
+Revises: 32d9be19f9d4
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c41e2a9b5d3"
+down_revision: Union[str, Sequence[str], None] = "32d9be19f9d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "addresses",
+        sa.Column("total_received", sa.BigInteger(), server_default="0", nullable=True),
+    )
+    op.add_column(
+        "addresses",
+        sa.Column("total_spent", sa.BigInteger(), server_default="0", nullable=True),
+    )
+
+    # Старая синхронизация создавала адрес не для всех выходов (мемпул,
+    # транзакции, загруженные по запросу): добавляем недостающие, иначе
+    # первое инкрементальное обновление запишет в новую строку только дельту
+    op.execute(
+        """
+        INSERT INTO addresses (
+            address, balance, total_received, total_spent, tx_count,
+            first_seen_block, last_seen_block, created_at
+        )
+        SELECT
+            transaction_outputs.address, 0, 0, 0, 0,
+            MIN(transactions.block_height), MAX(transactions.block_height),
+            CURRENT_TIMESTAMP
+        FROM transaction_outputs
+        JOIN transactions ON transactions.id = transaction_outputs.transaction_id
+        WHERE transaction_outputs.address IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM addresses
+                WHERE addresses.address = transaction_outputs.address
+            )
+        GROUP BY transaction_outputs.address
+        """
+    )
+
+    # Сохраненный balance мог устареть (адрес не обновлялся при трате),
+    # поэтому суммы считаем заново так же, как _calculate_address_balance
+    op.execute(
+        """
+        UPDATE addresses SET
+            total_received = COALESCE(
+                (
+                    SELECT SUM(transaction_outputs.value)
+                    FROM transaction_outputs
+                    WHERE transaction_outputs.address = addresses.address
+                ),
+                0
+            ),
+            total_spent = COALESCE(
+                (
+                    SELECT SUM(transaction_outputs.value)
+                    FROM transaction_outputs
+                    JOIN transactions
+                        ON transactions.id = transaction_outputs.transaction_id
+                    WHERE transaction_outputs.address = addresses.address
+                        AND EXISTS (
+                            SELECT 1 FROM transaction_inputs
+                            WHERE transaction_inputs.prev_txid = transactions.txid
+                                AND transaction_inputs.vout = transaction_outputs.n
+                        )
+                ),
+                0
+            ),
+            tx_count = (
+                SELECT COUNT(DISTINCT transaction_outputs.transaction_id)
+                FROM transaction_outputs
+                WHERE transaction_outputs.address = addresses.address
+            )
+        """
+    )
+    op.execute("UPDATE addresses SET balance = total_received - total_spent")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("addresses", "total_spent")
+    op.drop_column("addresses", "total_received")
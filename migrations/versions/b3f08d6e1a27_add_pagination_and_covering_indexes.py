@@ -0,0 +1,95 @@
+"""Add pagination and covering indexes for transactions
+
+Revision ID: b3f08d6e1a27
+Revises: 7c41e2a9b5d3
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f08d6e1a27"
+down_revision: Union[str, Sequence[str], None] = "7c41e2a9b5d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite не поддерживает NULLS LAST, частичные индексы без
+    # postgresql_where и INCLUDE (как ddl_if в моделях)
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # CONCURRENTLY не блокирует запись в большие таблицы и не работает
+    # внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transactions_block_height_id_desc",
+            "transactions",
+            [sa.text("block_height DESC NULLS LAST"), sa.text("id DESC")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_transactions_unconfirmed_id_desc",
+            "transactions",
+            [sa.text("id DESC")],
+            unique=False,
+            postgresql_where=sa.text("block_hash IS NULL"),
+            postgresql_concurrently=True,
+        )
+        # Покрывающий индекс строится под временным именем, чтобы поиск
+        # по адресу не оставался без индекса во время перестройки
+        _replace_outputs_address_index(
+            postgresql_include=["transaction_id", "n", "value"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        _replace_outputs_address_index()
+        op.drop_index(
+            "ix_transactions_unconfirmed_id_desc",
+            table_name="transactions",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_transactions_block_height_id_desc",
+            table_name="transactions",
+            postgresql_concurrently=True,
+        )
+
+
+def _replace_outputs_address_index(**kw) -> None:
+    """
+    Перестройка ix_transaction_outputs_address через временный индекс
+
+    Args:
+        **kw: Дополнительные параметры нового индекса
+    """
+    op.create_index(
+        "ix_transaction_outputs_address_new",
+        "transaction_outputs",
+        ["address"],
+        unique=False,
+        postgresql_concurrently=True,
+        **kw,
+    )
+    op.drop_index(
+        op.f("ix_transaction_outputs_address"),
+        table_name="transaction_outputs",
+        postgresql_concurrently=True,
+    )
+    op.execute(
+        "ALTER INDEX ix_transaction_outputs_address_new "
+        "RENAME TO ix_transaction_outputs_address"
+    )
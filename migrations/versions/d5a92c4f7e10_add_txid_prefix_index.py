@@ -0,0 +1,49 @@
+"""Add text_pattern_ops index for txid prefix search
+
+Revision ID: d5a92c4f7e10
+Revises: b3f08d6e1a27
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a92c4f7e10"
+down_revision: Union[str, Sequence[str], None] = "b3f08d6e1a27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # text_pattern_ops есть только в PostgreSQL; на SQLite получился бы
+    # дубликат уникального индекса ix_transactions_txid
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # CONCURRENTLY не блокирует запись и не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transactions_txid_prefix",
+            "transactions",
+            ["txid"],
+            unique=False,
+            postgresql_ops={"txid": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_transactions_txid_prefix",
+            table_name="transactions",
+            postgresql_concurrently=True,
+        )